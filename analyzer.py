@@ -1,30 +1,309 @@
+import asyncio
+import aiohttp
+from aiolimiter import AsyncLimiter
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import re
 import os
-from typing import Dict, List
+import time
+import hashlib
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
 import logging
 
+from extractor import CACHE_DIR
+
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    np = None
+    SentenceTransformer = None
+
 logger = logging.getLogger(__name__)
 
+_JSON_DECODER = json.JSONDecoder()
+
+def _extract_json(text: str, opener: str = '{'):
+    """Находит первый корректный JSON объект (или массив для opener='[') в ответе модели"""
+    expected = dict if opener == '{' else list
+    idx = text.find(opener)
+    while idx != -1:
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(text, idx)
+            if isinstance(obj, expected):
+                return obj
+        except json.JSONDecodeError:
+            pass
+        idx = text.find(opener, idx + 1)
+    return None
+
+_ECONOMIC_TERMS = (
+    'цена', 'курс', 'стоимость', 'подорожал', 'подешевел', 
+    'растет', 'падает', 'инвестиции', 'торги', 'биржа',
+    'унция', 'тройская', 'добыча', 'запасы'
+)
+
+# Целые словоформы для эвристики по заголовку: подстроки вроде "курс" в "конкурс"
+# не засчитываются, а "унция"/"тройская" уже учтены предфильтром как признаки металла
+_HEADLINE_TERMS = tuple(re.compile(rf'\b{term}\b') for term in (
+    r'цен(?:а|ы|е|у|ой)?', r'курс(?:а|е|у|ом)?', r'стоимост(?:ь|и|ью)',
+    r'подорожал[аио]?', r'подешевел[аио]?', r'раст(?:е|ё)т', r'пада(?:е|ю)т',
+    r'инвестици(?:я|и|й|ю|ях|ям)', r'торг(?:и|ах|ов)', r'бирж(?:а|е|и|у|ах)',
+    r'добыч(?:а|и|е|у)', r'запас(?:ы|ов|ах)'
+))
+
+_FIGURATIVE_TERMS = ('медал', 'призер', 'призёр', 'наград', 'юбиле', 'золотой ключ')
+
+_PROMPT_TMPL = """Проанализируй новость о возможном упоминании драгоценных металлов.
+
+Предварительно найдены упоминания: {metals}
+
+Заголовок: {title}
+Содержание: {content}
+
+Определи:
+1. Относится ли новость к драгоценным металлам (золото, серебро, платина, палладий) как к ТОВАРАМ, ИНВЕСТИЦИЯМ или ПРОМЫШЛЕННОМУ СЫРЬЮ?
+2. Какие конкретно металлы упоминаются в контексте торговли/инвестиций?
+3. Краткий пересказ (2-3 предложения) с важной экономической информацией.
+
+ВАЖНО: 
+- Игнорируй переносные значения ("золотая медаль", "серебряный призер", "золотой ключ")
+- Учитывай только прямые упоминания металлов как товаров или активов
+- Новости о ценах, курсах, добыче, инвестициях = релевантны
+- Новости о наградах, юбилеях, цветах = нерелевантны
+
+Ответь СТРОГО в JSON:
+{{"is_relevant": true/false, "metals": ["золото"], "summary": "краткий пересказ", "score": 0.9, "reason": "объяснение"}}"""
+
+_BATCH_PROMPT_TMPL = """Проанализируй список новостей о возможном упоминании драгоценных металлов.
+
+Для каждой новости определи:
+1. Относится ли новость к драгоценным металлам (золото, серебро, платина, палладий) как к ТОВАРАМ, ИНВЕСТИЦИЯМ или ПРОМЫШЛЕННОМУ СЫРЬЮ?
+2. Какие конкретно металлы упоминаются в контексте торговли/инвестиций?
+3. Краткий пересказ (2-3 предложения) с важной экономической информацией.
+
+ВАЖНО: 
+- Игнорируй переносные значения ("золотая медаль", "серебряный призер", "золотой ключ")
+- Учитывай только прямые упоминания металлов как товаров или активов
+- Новости о ценах, курсах, добыче, инвестициях = релевантны
+- Новости о наградах, юбилеях, цветах = нерелевантны
+
+Ответь СТРОГО JSON-массивом, по одному объекту на каждую новость в том же порядке:
+[{{"is_relevant": true/false, "metals": ["золото"], "summary": "краткий пересказ", "score": 0.9, "reason": "объяснение"}}]
+
+{news}
+
+Всего новостей: {count}. В массиве должно быть ровно {count} объектов."""
+
+_BATCH_ITEM_TMPL = """{number}) Предварительно найдены упоминания: {metals}
+Заголовок: {title}
+Содержание: {content}"""
+
+class _AnalyzeCache:
+    """Постоянный кэш ответов AI в SQLite"""
+    
+    def __init__(self, path: str = os.path.join(CACHE_DIR, 'llm.db'), ttl_seconds: int = 86400 * 7):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT, ts INTEGER)")
+        self.conn.execute("DELETE FROM llm_cache WHERE ts < ?", (int(time.time()) - self.ttl_seconds,))
+        self.conn.commit()
+    
+    @staticmethod
+    def cache_key(request: Dict) -> str:
+        return hashlib.sha256(json.dumps(request, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT value, ts FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+    
+    def set(self, key: str, value: Dict):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, ts) VALUES (?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), int(time.time()))
+        )
+        self.conn.commit()
+
+@dataclass
+class SemanticCacheConfig:
+    """Настройки семантического кэша"""
+    model_name: str = 'paraphrase-multilingual-MiniLM-L12-v2'
+    threshold: float = 0.92
+    ttl_seconds: int = 86400 * 7
+    path: str = os.path.join(CACHE_DIR, 'semcache.npz')
+
+class _SemanticCache:
+    """Кэш ответов AI для близких по смыслу заголовков из разных источников"""
+    
+    def __init__(self, config: SemanticCacheConfig):
+        self.config = config
+        self.model = SentenceTransformer(config.model_name)
+        
+        dim = self.model.get_sentence_embedding_dimension()
+        self.embeddings = np.empty((0, dim), dtype=np.float32)
+        self.timestamps = np.empty(0, dtype=np.int64)
+        self.metals: List[str] = []
+        self.analyses: List[Dict] = []
+        self._dirty = False
+        self._pending: List[Tuple["np.ndarray", str, asyncio.Future]] = []
+        
+        self._load()
+    
+    @staticmethod
+    def _metals_key(metals: List[str]) -> str:
+        return ','.join(sorted(metals))
+    
+    def _load(self):
+        if not os.path.exists(self.config.path):
+            return
+        
+        try:
+            with np.load(self.config.path) as data:
+                fresh = time.time() - data['timestamps'] <= self.config.ttl_seconds
+                self.embeddings = data['embeddings'][fresh]
+                self.timestamps = data['timestamps'][fresh]
+                self.metals = [str(m) for m in data['metals'][fresh]]
+                self.analyses = [json.loads(a) for a in data['analyses'][fresh]]
+            logger.info(f"Загружен семантический кэш: {len(self.analyses)} записей")
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Не удалось загрузить семантический кэш: {e}")
+    
+    def save(self):
+        """Сохраняет кэш на диск, отбрасывая устаревшие записи"""
+        if not self._dirty:
+            return
+        
+        fresh = time.time() - self.timestamps <= self.config.ttl_seconds
+        self.embeddings = self.embeddings[fresh]
+        self.timestamps = self.timestamps[fresh]
+        self.metals = [m for m, keep in zip(self.metals, fresh) if keep]
+        self.analyses = [a for a, keep in zip(self.analyses, fresh) if keep]
+        
+        os.makedirs(os.path.dirname(self.config.path), exist_ok=True)
+        tmp_path = f"{self.config.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                embeddings=self.embeddings,
+                timestamps=self.timestamps,
+                metals=np.array(self.metals, dtype=str),
+                analyses=np.array([json.dumps(a, ensure_ascii=False) for a in self.analyses], dtype=str)
+            )
+        os.replace(tmp_path, self.config.path)
+        self._dirty = False
+    
+    def encode(self, titles: List[str]) -> "np.ndarray":
+        """Эмбеддинги заголовков одним вызовом модели"""
+        return self.model.encode(titles, normalize_embeddings=True).astype(np.float32)
+    
+    def lookup(self, embedding: "np.ndarray", metals: List[str]) -> Optional[Dict]:
+        """Ищет анализ похожей новости по эмбеддингу заголовка"""
+        if not self.analyses:
+            return None
+        
+        metals_key = self._metals_key(metals)
+        candidates = (time.time() - self.timestamps <= self.config.ttl_seconds) & np.array(
+            [m == metals_key for m in self.metals]
+        )
+        if not candidates.any():
+            return None
+        
+        scores = np.where(candidates, self.embeddings @ embedding, -1.0)
+        best = int(scores.argmax())
+        if scores[best] >= self.config.threshold:
+            return self.analyses[best]
+        return None
+    
+    def add(self, embedding: "np.ndarray", metals: List[str], analysis: Dict):
+        self.embeddings = np.vstack([self.embeddings, embedding[np.newaxis]])
+        self.timestamps = np.append(self.timestamps, int(time.time()))
+        self.metals.append(self._metals_key(metals))
+        self.analyses.append(analysis)
+        self._dirty = True
+        
+        for other, _, future in self._pending:
+            if other is embedding and not future.done():
+                future.set_result(analysis)
+    
+    def find_pending(self, embedding: "np.ndarray", metals: List[str]) -> Optional[asyncio.Future]:
+        """Ищет похожую новость, анализ которой уже запрошен параллельно в этом прогоне"""
+        metals_key = self._metals_key(metals)
+        for other, other_metals, future in self._pending:
+            if other_metals == metals_key and float(other @ embedding) >= self.config.threshold:
+                return future
+        return None
+    
+    def claim(self, embedding: "np.ndarray", metals: List[str]) -> asyncio.Future:
+        """Регистрирует запрос анализа, чтобы параллельные копии новости дождались его результата"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((embedding, self._metals_key(metals), future))
+        return future
+    
+    def release(self, futures: List[asyncio.Future]):
+        """Завершает ожидание копий; None означает, что анализ не получен и копии запросят его сами"""
+        for future in futures:
+            if not future.done():
+                future.set_result(None)
+        self._pending = [entry for entry in self._pending if not entry[2].done()]
+
 class OpenRouterAnalyzer:
     """Анализатор новостей через OpenRouter.ai API с DeepSeek"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, use_cache: bool = True,
+                 semantic_cache_config: Optional[SemanticCacheConfig] = None):
         self.api_key = api_key or os.getenv('OPENROUTER_API_KEY')
         self.base_url = "https://openrouter.ai/api/v1"
         self.model = "deepseek/deepseek-chat"
+        self.max_backoff = 32
+        # Не больше 60 запросов в минуту к OpenRouter; ждем только при исчерпании бюджета
+        self.rate_limit = (60, 60)
+        self._limiter = None
+        self._limiter_loop = None
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, pool_block=False)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         
         if not self.api_key:
             raise ValueError("OpenRouter API ключ не найден. Установите OPENROUTER_API_KEY в .env файле")
         
-        self.session.headers.update({
+        self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, deflate, br",
+            "Connection": "keep-alive",
             "HTTP-Referer": "https://github.com/metals-news-parser",
             "X-Title": "Metals News Parser"
-        })
+        }
+        self.session.headers.update(self.headers)
+        self.timeout = aiohttp.ClientTimeout(total=60)
+        self.heuristic_min_terms = 2
+        self.requested_items = 0
+        self.cached_items = 0
+        self._payload_base = {"model": self.model, "temperature": 0.1, "max_tokens": 400, "top_p": 0.9}
+        
+        self.cache = None
+        if use_cache:
+            try:
+                self.cache = _AnalyzeCache()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Кэш ответов AI недоступен: {e}")
+        
+        self.semantic_cache = None
+        if use_cache:
+            if SentenceTransformer is None:
+                logger.info("sentence-transformers не установлен, семантический кэш отключен")
+            else:
+                try:
+                    self.semantic_cache = _SemanticCache(semantic_cache_config or SemanticCacheConfig())
+                except Exception as e:
+                    logger.warning(f"Семантический кэш недоступен: {e}")
         
         logger.info(f"OpenRouter анализатор инициализирован с моделью: {self.model}")
     
@@ -48,69 +327,311 @@ class OpenRouterAnalyzer:
             logger.error(f"❌ Ошибка тестирования OpenRouter: {e}")
             return False
     
+    def create_session(self) -> aiohttp.ClientSession:
+        """Создает aiohttp сессию для асинхронных запросов к OpenRouter"""
+        connector = aiohttp.TCPConnector(limit=64, keepalive_timeout=60)
+        return aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=self.timeout)
+    
+    def save_caches(self):
+        """Сбрасывает семантический кэш на диск; вызывается один раз в конце прогона"""
+        if not self.semantic_cache:
+            return
+        try:
+            self.semantic_cache.save()
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить семантический кэш: {e}")
+    
     def analyze_news(self, title: str, content: str, preliminary_metals: List[str]) -> Dict:
+        """Синхронная обертка над analyze_news_async"""
+        async def run() -> Dict:
+            async with self.create_session() as session:
+                return await self.analyze_news_async(session, title, content, preliminary_metals)
+        
+        try:
+            return asyncio.run(run())
+        finally:
+            self.save_caches()
+    
+    def analyze_news_batch(self, items: List[Tuple[str, str, List[str]]]) -> List[Dict]:
+        """Синхронная обертка над analyze_news_batch_async"""
+        async def run() -> List[Dict]:
+            async with self.create_session() as session:
+                return await self.analyze_news_batch_async(session, items)
+        
+        try:
+            return asyncio.run(run())
+        finally:
+            self.save_caches()
+    
+    async def analyze_news_async(self, session: aiohttp.ClientSession, title: str, content: str,
+                                 preliminary_metals: List[str]) -> Dict:
+        [analysis] = await self.analyze_news_batch_async(session, [(title, content, preliminary_metals)])
+        return analysis
+    
+    async def analyze_news_batch_async(self, session: aiohttp.ClientSession,
+                                       items: List[Tuple[str, str, List[str]]]) -> List[Dict]:
+        """Анализирует несколько новостей одним запросом, сохраняя порядок items"""
+        results = []
+        misses = []
+        for index, (title, content, preliminary_metals) in enumerate(items):
+            prompt = self._build_prompt(title, content, preliminary_metals)
+            cached, cache_key = self._lookup_cache(title, prompt)
+            results.append(cached)
+            if cached is None:
+                misses.append((index, prompt, cache_key, None))
+        
+        claimed = []
+        waiting = []
+        if misses and self.semantic_cache:
+            embeddings = await self._embed([items[index][0] for index, _, _, _ in misses])
+            remaining = []
+            for (index, prompt, cache_key, _), embedding in zip(misses, embeddings):
+                title, _, preliminary_metals = items[index]
+                cached = self._lookup_similar(title, embedding, preliminary_metals)
+                if cached is not None:
+                    results[index] = cached
+                    continue
+                
+                # Перепечатки из других лент анализируются параллельно: ждем уже отправленный запрос
+                pending = self.semantic_cache.find_pending(embedding, preliminary_metals)
+                if pending is not None:
+                    waiting.append((index, prompt, cache_key, embedding, pending))
+                    continue
+                
+                claimed.append(self.semantic_cache.claim(embedding, preliminary_metals))
+                remaining.append((index, prompt, cache_key, embedding))
+            misses = remaining
+        
+        try:
+            if misses:
+                await self._analyze_misses(session, items, misses, results)
+        finally:
+            if claimed:
+                self.semantic_cache.release(claimed)
+        
+        for index, prompt, cache_key, embedding, pending in waiting:
+            title, content, preliminary_metals = items[index]
+            analysis = await pending
+            if analysis is None:
+                self.requested_items += 1
+                analysis = await self._request_analysis(
+                    session, title, content, preliminary_metals, prompt, cache_key, embedding
+                )
+            else:
+                logger.info(f"💾 Ответ AI взят из кэша похожей новости: {title[:50]}...")
+                self.cached_items += 1
+                self._remember(cache_key, None, preliminary_metals, analysis)
+            results[index] = analysis
+        
+        return results
+    
+    async def _analyze_misses(self, session: aiohttp.ClientSession, items: List[Tuple[str, str, List[str]]],
+                              misses: List[Tuple[int, str, Optional[str], object]], results: List[Optional[Dict]]):
+        """Запрашивает у AI анализ новостей, которых нет в кэше, и записывает его в results"""
+        self.requested_items += len(misses)
+        if len(misses) == 1:
+            index, prompt, cache_key, embedding = misses[0]
+            results[index] = await self._request_analysis(session, *items[index], prompt, cache_key, embedding)
+            return
+        
+        analyses = await self._request_batch(session, [items[index] for index, _, _, _ in misses])
+        if analyses is None:
+            logger.warning(f"Пакетный запрос не удался, анализируем {len(misses)} новостей по одной")
+            analyses = [None] * len(misses)
+        
+        retries = []
+        for (index, prompt, cache_key, embedding), analysis in zip(misses, analyses):
+            if analysis is None:
+                retries.append((index, prompt, cache_key, embedding))
+                continue
+            
+            self._remember(cache_key, embedding, items[index][2], analysis)
+            results[index] = analysis
+        
+        single_results = await asyncio.gather(*(
+            self._request_analysis(session, *items[index], prompt, cache_key, embedding)
+            for index, prompt, cache_key, embedding in retries
+        ))
+        for (index, _, _, _), analysis in zip(retries, single_results):
+            results[index] = analysis
+    
+    def _build_prompt(self, title: str, content: str, preliminary_metals: List[str]) -> str:
+        return _PROMPT_TMPL.format(metals=', '.join(preliminary_metals), title=title, content=content[:1000])
+    
+    def _build_batch_prompt(self, items: List[Tuple[str, str, List[str]]]) -> str:
+        news_blocks = "\n\n".join(
+            _BATCH_ITEM_TMPL.format(number=number, metals=', '.join(preliminary_metals), title=title, content=content[:1000])
+            for number, (title, content, preliminary_metals) in enumerate(items, 1)
+        )
+        return _BATCH_PROMPT_TMPL.format(news=news_blocks, count=len(items))
+    
+    def _lookup_cache(self, title: str, prompt: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Ищет анализ в точном кэше, возвращает (анализ, ключ)"""
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.cache_key({
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": self._payload_base["temperature"]
+            })
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"💾 Ответ AI взят из кэша: {title[:50]}...")
+                self.cached_items += 1
+                return cached, cache_key
+        
+        return None, cache_key
+    
+    async def _embed(self, titles: List[str]) -> "np.ndarray":
+        """Считает эмбеддинги вне event loop, чтобы не блокировать загрузки и запросы"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.semantic_cache.encode, titles)
+    
+    def _lookup_similar(self, title: str, embedding, preliminary_metals: List[str]) -> Optional[Dict]:
+        cached = self.semantic_cache.lookup(embedding, preliminary_metals)
+        if cached is not None:
+            logger.info(f"💾 Ответ AI взят из кэша похожей новости: {title[:50]}...")
+            self.cached_items += 1
+        return cached
+    
+    def _normalize_analysis(self, analysis: Dict, preliminary_metals: List[str]) -> Dict:
+        return {
+            "is_relevant": bool(analysis.get('is_relevant', False)),
+            "metals": analysis.get('metals', preliminary_metals),
+            "summary": str(analysis.get('summary', '')),
+            "score": float(analysis.get('score', 0.0)),
+            "reason": str(analysis.get('reason', ''))
+        }
+    
+    async def _request_analysis(self, session: aiohttp.ClientSession, title: str, content: str,
+                                preliminary_metals: List[str], prompt: str, cache_key: Optional[str], embedding) -> Dict:
+        messages = [{"role": "user", "content": prompt}]
         
-        prompt = f"""Проанализируй новость о возможном упоминании драгоценных металлов.
-
-Предварительно найдены упоминания: {', '.join(preliminary_metals)}
-
-Заголовок: {title}
-Содержание: {content[:1000]}
-
-Определи:
-1. Относится ли новость к драгоценным металлам (золото, серебро, платина, палладий) как к ТОВАРАМ, ИНВЕСТИЦИЯМ или ПРОМЫШЛЕННОМУ СЫРЬЮ?
-2. Какие конкретно металлы упоминаются в контексте торговли/инвестиций?
-3. Краткий пересказ (2-3 предложения) с важной экономической информацией.
-
-ВАЖНО: 
-- Игнорируй переносные значения ("золотая медаль", "серебряный призер", "золотой ключ")
-- Учитывай только прямые упоминания металлов как товаров или активов
-- Новости о ценах, курсах, добыче, инвестициях = релевантны
-- Новости о наградах, юбилеях, цветах = нерелевантны
-
-Ответь СТРОГО в JSON:
-{{"is_relevant": true/false, "metals": ["золото"], "summary": "краткий пересказ", "score": 0.9, "reason": "объяснение"}}"""
-
         try:
-            response = self.session.post(
+            response = await self._post_with_backoff(
+                session,
                 f"{self.base_url}/chat/completions",
-                json={
-                    "model": self.model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.1,
-                    "max_tokens": 400,
-                    "top_p": 0.9
-                },
-                timeout=60
+                json={**self._payload_base, "messages": messages}
             )
             
-            if response.status_code == 200:
-                result = response.json()
+            if response.status == 200:
+                result = await response.json()
                 ai_response = result['choices'][0]['message']['content']
                 
                 try:
-                    json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-                    if json_match:
-                        analysis = json.loads(json_match.group())
-                        return {
-                            "is_relevant": bool(analysis.get('is_relevant', False)),
-                            "metals": analysis.get('metals', preliminary_metals),
-                            "summary": str(analysis.get('summary', '')),
-                            "score": float(analysis.get('score', 0.0)),
-                            "reason": str(analysis.get('reason', ''))
-                        }
+                    analysis = _extract_json(ai_response)
+                    if analysis is not None:
+                        parsed = self._normalize_analysis(analysis, preliminary_metals)
+                        self._remember(cache_key, embedding, preliminary_metals, parsed)
+                        return parsed
                 except (json.JSONDecodeError, ValueError, KeyError) as e:
                     logger.warning(f"Ошибка парсинга JSON: {e}")
-                    return self._parse_ai_response(ai_response, preliminary_metals)
+                
+                return self._parse_ai_response(ai_response, preliminary_metals)
                 
             else:
-                logger.error(f"OpenRouter API ошибка: {response.status_code}")
+                logger.error(f"OpenRouter API ошибка: {response.status}")
                 return self._fallback_analysis(title, content, preliminary_metals)
                 
         except Exception as e:
             logger.error(f"Ошибка запроса к OpenRouter: {e}")
             return self._fallback_analysis(title, content, preliminary_metals)
     
+    async def _request_batch(self, session: aiohttp.ClientSession,
+                             items: List[Tuple[str, str, List[str]]]) -> Optional[List[Optional[Dict]]]:
+        """Один запрос на пакет новостей.
+        
+        Возвращает None, если запрос не удался, и None на месте новостей,
+        которые нужно проанализировать по отдельности.
+        """
+        messages = [{"role": "user", "content": self._build_batch_prompt(items)}]
+        
+        try:
+            response = await self._post_with_backoff(
+                session,
+                f"{self.base_url}/chat/completions",
+                json={**self._payload_base, "messages": messages,
+                      "max_tokens": self._payload_base["max_tokens"] * len(items)},
+                # Ответ на пакет генерируется дольше одиночного, таймаут растет вместе с max_tokens
+                timeout=aiohttp.ClientTimeout(total=self.timeout.total * len(items))
+            )
+            
+            if response.status != 200:
+                logger.error(f"OpenRouter API ошибка: {response.status}")
+                return None
+            
+            result = await response.json()
+            ai_response = result['choices'][0]['message']['content']
+            
+            analyses = _extract_json(ai_response, '[')
+            if not isinstance(analyses, list) or len(analyses) != len(items):
+                logger.warning("Ответ на пакетный запрос не соответствует числу новостей, анализируем по одной")
+                return [None] * len(items)
+            
+            normalized = []
+            for analysis, (_, _, preliminary_metals) in zip(analyses, items):
+                try:
+                    normalized.append(self._normalize_analysis(analysis, preliminary_metals))
+                except (AttributeError, ValueError, TypeError):
+                    normalized.append(None)
+            return normalized
+            
+        except (json.JSONDecodeError, KeyError, IndexError) as e:
+            logger.warning(f"Ошибка разбора пакетного ответа: {e}")
+            return [None] * len(items)
+        except Exception as e:
+            logger.error(f"Ошибка запроса к OpenRouter: {e}")
+            return None
+    
+    def _remember(self, cache_key: Optional[str], embedding, preliminary_metals: List[str], analysis: Dict):
+        """Сохраняет анализ в точный и семантический кэш"""
+        if self.cache and cache_key:
+            self.cache.set(cache_key, analysis)
+        if self.semantic_cache and embedding is not None:
+            self.semantic_cache.add(embedding, preliminary_metals, analysis)
+    
+    def _get_limiter(self) -> AsyncLimiter:
+        """Лимитер для текущего event loop: синхронные обертки каждый раз запускают новый loop"""
+        loop = asyncio.get_running_loop()
+        if self._limiter_loop is not loop:
+            self._limiter = AsyncLimiter(*self.rate_limit)
+            self._limiter_loop = loop
+        return self._limiter
+    
+    async def _post_with_backoff(self, session: aiohttp.ClientSession, url: str, max_retries: int = 6,
+                                 **kwargs) -> aiohttp.ClientResponse:
+        """POST запрос с экспоненциальной задержкой при 429, 5xx и сетевых ошибках"""
+        response = None
+        for attempt in range(max_retries):
+            delay = min(2 ** attempt, self.max_backoff)
+            is_last = attempt == max_retries - 1
+            
+            try:
+                async with self._get_limiter():
+                    async with session.post(url, **kwargs) as response:
+                        await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if is_last:
+                    raise
+                logger.warning(f"Сетевая ошибка OpenRouter: {e}, повтор через {delay:.0f}с")
+                await asyncio.sleep(delay)
+                continue
+            
+            if response.status == 429:
+                try:
+                    delay = min(float(response.headers.get('Retry-After', delay)), self.max_backoff)
+                except ValueError:
+                    pass
+            elif not 500 <= response.status < 600:
+                return response
+            
+            if is_last:
+                break
+            
+            logger.warning(f"OpenRouter ответил {response.status}, повтор через {delay:.0f}с (попытка {attempt + 1}/{max_retries})")
+            await asyncio.sleep(delay)
+        
+        return response
+    
     def _parse_ai_response(self, response: str, preliminary_metals: List[str]) -> Dict:
         """Парсит текстовый ответ AI"""
         text = response.lower()
@@ -126,17 +647,33 @@ class OpenRouterAnalyzer:
             "reason": "Parsed from non-JSON response"
         }
     
+    def confident_analysis(self, title: str, summary: str, preliminary_metals: List[str]) -> Optional[Dict]:
+        """Анализ без AI по заголовку и анонсу RSS, если эвристика достаточно уверена"""
+        if not preliminary_metals or not self.heuristic_min_terms:
+            return None
+        
+        text = f"{title} {summary}".lower()
+        if any(term in text for term in _FIGURATIVE_TERMS):
+            return None
+        
+        matched_terms = sum(1 for pattern in _HEADLINE_TERMS if pattern.search(text))
+        if matched_terms < self.heuristic_min_terms:
+            return None
+        
+        logger.info(f"⚡ Эвристика уверена ({matched_terms} экономических терминов), AI не вызывается: {title[:50]}...")
+        return {
+            "is_relevant": True,
+            "score": 0.75,
+            "metals": preliminary_metals,
+            "summary": f"{title[:150]}...",
+            "reason": f"Эвристика: найдено {matched_terms} экономических терминов, AI не вызывался"
+        }
+    
     def _fallback_analysis(self, title: str, content: str, preliminary_metals: List[str]) -> Dict:
         """Резервный анализ без AI"""
         text = f"{title} {content}".lower()
         
-        economic_terms = [
-            'цена', 'курс', 'стоимость', 'подорожал', 'подешевел', 
-            'растет', 'падает', 'инвестиции', 'торги', 'биржа',
-            'унция', 'тройская', 'добыча', 'запасы'
-        ]
-        
-        has_economic_context = any(term in text for term in economic_terms)
+        has_economic_context = any(term in text for term in _ECONOMIC_TERMS)
         
         if has_economic_context and preliminary_metals:
             return {
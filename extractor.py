@@ -1,62 +1,164 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+from concurrent.futures import Executor
+import aiohttp
+from selectolax.lexbor import LexborHTMLParser
 import logging
+import os
+import sqlite3
+import time
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'metals_parser')
+
+def _join_until(nodes, limit: int) -> str:
+    """Склеивает непустой текст узлов, пока не наберется limit символов"""
+    buf = []
+    total = 0
+    for node in nodes:
+        text = node.text(strip=True)
+        if not text:
+            continue
+        buf.append(text)
+        total += len(text) + 1
+        if total >= limit:
+            break
+    return ' '.join(buf)[:limit]
+
+def _parse_html(html: str, limit: int = 2500) -> str:
+    """Извлекает текст статьи из HTML; функция модульного уровня, чтобы работать в ProcessPoolExecutor"""
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(['script', 'style', 'nav', 'header', 'footer', 'aside'])
+    
+    content_selectors = [
+        'article', '.article-body', '.article-content', '.news-content',
+        '.text', '.content', '.post-content', '[itemprop="articleBody"]',
+        '.js-mediator-article', '.article__text'
+    ]
+    
+    for selector in content_selectors:
+        content = _join_until(tree.css(selector), limit)
+        if content:
+            return content
+    
+    return _join_until(tree.css('p'), limit)
+
+class _HttpCache:
+    """Кэш загруженных страниц с поддержкой условных запросов (ETag/Last-Modified)"""
+    
+    def __init__(self, path: str = os.path.join(CACHE_DIR, 'http.db'), max_age: int = 3600,
+                 retention: int = 86400 * 7):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_age = max_age
+        self.retention = retention
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS http_cache "
+            "(url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body TEXT, ts INTEGER)"
+        )
+        # Ограничиваем рост базы: страницы старше окна хранения (как у кэша AI) удаляются
+        self.conn.execute("DELETE FROM http_cache WHERE ts < ?", (int(time.time()) - self.retention,))
+        self.conn.commit()
+    
+    def get(self, url: str) -> Optional[sqlite3.Row]:
+        return self.conn.execute(
+            "SELECT etag, last_modified, body, ts FROM http_cache WHERE url = ?", (url,)
+        ).fetchone()
+    
+    def is_fresh(self, entry: sqlite3.Row) -> bool:
+        return time.time() - entry['ts'] < self.max_age
+    
+    def set(self, url: str, etag: Optional[str], last_modified: Optional[str], body: str):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO http_cache (url, etag, last_modified, body, ts) VALUES (?, ?, ?, ?, ?)",
+            (url, etag, last_modified, body, int(time.time()))
+        )
+        self.conn.commit()
+    
+    def touch(self, url: str):
+        self.conn.execute("UPDATE http_cache SET ts = ? WHERE url = ?", (int(time.time()), url))
+        self.conn.commit()
+
 class ContentExtractor:
     """Извлечение контента из веб-страниц"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+    def __init__(self, use_cache: bool = True):
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'ru-RU,ru;q=0.8,en-US;q=0.5,en;q=0.3',
-        })
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Connection': 'keep-alive',
+        }
+        self.timeout = aiohttp.ClientTimeout(total=15)
         
         self.problematic_domains = [
             'finam.ru/publications/item',
         ]
         
+        self.cache = None
+        if use_cache:
+            try:
+                self.cache = _HttpCache()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"HTTP кэш недоступен: {e}")
+        
         logger.info("Инициализирован экстрактор контента")
     
+    def create_session(self) -> aiohttp.ClientSession:
+        """Создает aiohttp сессию с общим пулом соединений"""
+        connector = aiohttp.TCPConnector(limit=50, limit_per_host=5, keepalive_timeout=60)
+        return aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=self.timeout)
+    
     def should_skip_url(self, url: str) -> bool:
         return any(domain in url for domain in self.problematic_domains)
     
-    def extract_article_content(self, url: str) -> str:
+    async def _fetch(self, session: aiohttp.ClientSession, url: str) -> str:
+        cached = self.cache.get(url) if self.cache else None
+        
+        headers = {}
+        if cached:
+            if self.cache.is_fresh(cached):
+                return cached['body']
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+        
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304 and cached:
+                    self.cache.touch(url)
+                    return cached['body']
+                
+                response.raise_for_status()
+                body = await response.text(errors='replace')
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if cached:
+                logger.debug(f"Используем устаревшую копию {url}: {e}")
+                return cached['body']
+            raise
+        
+        if self.cache:
+            self.cache.set(url, etag, last_modified, body)
+        return body
+    
+    async def extract_article_content(self, session: aiohttp.ClientSession, url: str,
+                                      executor: Optional[Executor] = None) -> str:
         try:
             if self.should_skip_url(url):
                 logger.debug(f"Пропуск проблемного URL: {url}")
                 return ""
             
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
-                element.decompose()
-            
-            content_selectors = [
-                'article', '.article-body', '.article-content', '.news-content',
-                '.text', '.content', '.post-content', '[itemprop="articleBody"]',
-                '.js-mediator-article', '.article__text'
-            ]
-            
-            content = ""
-            for selector in content_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    content = ' '.join([elem.get_text(strip=True) for elem in elements])
-                    break
-            
-            if not content:
-                paragraphs = soup.find_all('p')
-                content = ' '.join([p.get_text(strip=True) for p in paragraphs])
-            
-            return content[:2500]
-            
+            html = await self._fetch(session, url)
+            if executor is None:
+                return _parse_html(html)
+            return await asyncio.get_running_loop().run_in_executor(executor, _parse_html, html)
+        
         except Exception as e:
             logger.debug(f"Ошибка извлечения контента {url}: {e}")
             return ""
\ No newline at end of file
@@ -1,8 +1,13 @@
-from typing import List, Tuple
+from typing import FrozenSet, List, Tuple
 import logging
+import ahocorasick
 
 logger = logging.getLogger(__name__)
 
+def _is_word_char(char: str) -> bool:
+    """Символ слова в смысле \\b регулярных выражений"""
+    return char.isalnum() or char == '_'
+
 class NewsPreFilter:
     """Предварительная фильтрация новостей по ключевым словам"""
     
@@ -27,28 +32,37 @@ class NewsPreFilter:
             ]
         }
         
+        self._automaton = ahocorasick.Automaton()
+        for metal, keywords in self.metal_keywords.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                _, metals = self._automaton.get(keyword, (0, ()))
+                self._automaton.add_word(keyword, (len(keyword), metals + (metal,)))
+        self._automaton.make_automaton()
+        
         logger.info(f"Инициализирован предфильтр с {len(self.metal_keywords)} металлами")
     
-    def contains_metal_keywords(self, text: str) -> Tuple[bool, List[str]]:
+    def contains_metal_keywords(self, text: str) -> Tuple[bool, FrozenSet[str]]:
         text_lower = text.lower()
-        found_metals = []
+        found = set()
         
-        import re
-        for metal, keywords in self.metal_keywords.items():
-            for keyword in keywords:
-                pattern = r'\b' + re.escape(keyword) + r'\b'
-                if re.search(pattern, text_lower):
-                    found_metals.append(metal)
-                    break
+        for end, (length, metals) in self._automaton.iter(text_lower):
+            start = end - length + 1
+            if start > 0 and _is_word_char(text_lower[start - 1]):
+                continue
+            if end + 1 < len(text_lower) and _is_word_char(text_lower[end + 1]):
+                continue
+            found.update(metals)
         
-        return len(found_metals) > 0, found_metals
+        return bool(found), frozenset(found)
     
     def pre_filter_news(self, title: str, summary: str) -> Tuple[bool, List[str], str]:
         full_text = f"{title} {summary}"
         
-        has_metals, found_metals = self.contains_metal_keywords(full_text)
+        has_metals, found = self.contains_metal_keywords(full_text)
         
         if not has_metals:
             return False, [], "нет упоминаний металлов"
         
+        found_metals = [metal for metal in self.metal_keywords if metal in found]
         return True, found_metals, "прошел предфильтр"
\ No newline at end of file
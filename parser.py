@@ -1,11 +1,20 @@
-import json
+import asyncio
+import os
 import time
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
+import aiohttp
 import feedparser
+import orjson
 import logging
-from typing import List, Dict
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
+from itertools import chain
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 from filters import NewsPreFilter
 from analyzer import OpenRouterAnalyzer
@@ -13,6 +22,13 @@ from extractor import ContentExtractor
 
 logger = logging.getLogger(__name__)
 
+def normalize_url(url: str) -> str:
+    """Приводит URL к каноничному виду для дедупликации: без utm_* параметров, схема и хост в нижнем регистре"""
+    parts = urlsplit(url.strip())
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+             if not key.lower().startswith('utm_')]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), parts.fragment))
+
 @dataclass
 class NewsItem:
     """Структура новости"""
@@ -26,14 +42,14 @@ class NewsItem:
 
 class MetalsNewsParser:
     """Главный класс парсера с модульной архитектурой"""
-    
-    def __init__(self):
+
+    def __init__(self, use_cache: bool = True):
         """Инициализация всех компонентов"""
         self.pre_filter = NewsPreFilter()
-        self.content_extractor = ContentExtractor()
+        self.content_extractor = ContentExtractor(use_cache=use_cache)
         
         try:
-            self.ai_analyzer = OpenRouterAnalyzer()
+            self.ai_analyzer = OpenRouterAnalyzer(use_cache=use_cache)
             if not self.ai_analyzer.test_connection():
                 logger.warning("Проблемы с OpenRouter, будет использован fallback")
         except Exception as e:
@@ -67,45 +83,60 @@ class MetalsNewsParser:
             'total_processed': 0,
             'pre_filtered_out': 0,
             'ai_analyzed': 0,
+            'resolved_without_ai': 0,
             'relevant_found': 0
         }
         
+        self.max_concurrent_fetches = 15
+        self.max_concurrent_analyses = 8
+        self.analysis_batch_size = 8
+        self.parse_workers = os.cpu_count() or 1
+        # Разбор статьи занимает около 2 мс, пул процессов окупается только на крупных лентах
+        self.parse_pool_min_articles = 16
+        self._fetch_semaphore = None
+        self._parse_executor = None
+        self._ai_semaphore = None
+        self._seen_urls = set()
+        
         logger.info(f"Парсер инициализирован с {len(self.news_sources)} источниками")
 
-    def parse_rss_feed(self, rss_url: str, source_name: str, max_age_hours: int = 24) -> List[NewsItem]:
+    async def parse_rss_feed(self, session: aiohttp.ClientSession, ai_session: Optional[aiohttp.ClientSession],
+                             rss_url: str, source_name: str, max_age_hours: int = 24) -> List[NewsItem]:
         """Парсит RSS ленту с многоуровневой фильтрацией"""
         news_items = []
+        total_entries = 0
+        filtered_by_time = 0
         
         try:
             logger.info(f"📡 Парсинг RSS: {rss_url}")
             
-            feed = feedparser.parse(rss_url)
+            data, response_headers = await self._fetch_feed(session, rss_url)
+            feed = feedparser.parse(data, response_headers=response_headers)
             
             if feed.bozo:
                 logger.warning(f"⚠️ Проблемы с RSS: {feed.bozo_exception}")
             
-            logger.info(f"📊 RSS содержит {len(feed.entries)} записей")
+            total_entries = len(feed.entries)
+            logger.info(f"📊 RSS содержит {total_entries} записей")
             
             cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
             logger.info(f"⏰ Ищем новости после: {cutoff_time.strftime('%Y-%m-%d %H:%M:%S')}")
+            cutoff_epoch = time.mktime(cutoff_time.timetuple())
             
-            filtered_by_time = 0
-            
+            pending = []
+            decided = []
             for entry in feed.entries:
                 try:
                     self.stats['total_processed'] += 1
                     
-                    if hasattr(entry, 'published_parsed') and entry.published_parsed:
+                    published_parsed = getattr(entry, 'published_parsed', None)
+                    if published_parsed:
                         try:
-                            pub_date = datetime(*entry.published_parsed[:6])
-                        except (ValueError, TypeError):
-                            pub_date = datetime.now()
-                    else:
-                        pub_date = datetime.now()
-                    
-                    if pub_date < cutoff_time:
-                        filtered_by_time += 1
-                        continue
+                            if time.mktime(published_parsed) < cutoff_epoch:
+                                filtered_by_time += 1
+                                continue
+                        except (OverflowError, ValueError, TypeError):
+                            published_parsed = None
                     
                     title = getattr(entry, 'title', '')
                     summary = getattr(entry, 'summary', '')
@@ -114,8 +145,13 @@ class MetalsNewsParser:
                     if not title or not url:
                         continue
                     
+                    normalized_url = normalize_url(url)
+                    if normalized_url in self._seen_urls:
+                        logger.debug(f"Повтор URL из другой ленты: {url}")
+                        continue
+                    
                     if summary:
-                        summary = BeautifulSoup(summary, 'html.parser').get_text()
+                        summary = LexborHTMLParser(summary).text()
                     
                     should_process, preliminary_metals, reason = self.pre_filter.pre_filter_news(title, summary)
                     
@@ -125,19 +161,46 @@ class MetalsNewsParser:
                     
                     logger.info(f"✅ Предфильтр пройден: {title[:50]}... (металлы: {', '.join(preliminary_metals)})")
                     
-                    full_content = self.content_extractor.extract_article_content(url)
-                    content_for_analysis = f"{title} {summary} {full_content}"
-                    
-                    self.stats['ai_analyzed'] += 1
-                    logger.info(f"🤖 DeepSeek анализ: {title[:50]}...")
+                    try:
+                        pub_date = datetime(*published_parsed[:6]) if published_parsed else datetime.now()
+                    except (ValueError, TypeError):
+                        pub_date = datetime.now()
+                    self._seen_urls.add(normalized_url)
                     
-                    if self.ai_analyzer:
-                        analysis = self.ai_analyzer.analyze_news(title, content_for_analysis, preliminary_metals)
+                    entry_data = (title, summary, url, pub_date, preliminary_metals)
+                    confident = (self.ai_analyzer.confident_analysis(title, summary, preliminary_metals)
+                                 if self.ai_analyzer else None)
+                    if confident is not None:
+                        self.stats['resolved_without_ai'] += 1
+                        decided.append((entry_data, confident))
                     else:
-                        analysis = {
-                            "is_relevant": False, "metals": [], "summary": "", 
-                            "score": 0.0, "reason": "AI недоступен"
-                        }
+                        pending.append(entry_data)
+                
+                except Exception as e:
+                    logger.error(f"Ошибка обработки записи: {e}")
+                    continue
+            
+            executor = self._get_parse_executor() if len(pending) >= self.parse_pool_min_articles else None
+            contents = await asyncio.gather(*(self._extract_content(session, item[2], executor) for item in pending))
+            
+            items = [
+                (title, f"{title} {summary} {full_content}", preliminary_metals)
+                for (title, summary, _, _, preliminary_metals), full_content in zip(pending, contents)
+            ]
+            batches = [items[i:i + self.analysis_batch_size] for i in range(0, len(items), self.analysis_batch_size)]
+            batch_results = await asyncio.gather(
+                *(self._analyze_batch(ai_session, batch) for batch in batches),
+                return_exceptions=True
+            )
+            
+            analyses = []
+            for batch, result in zip(batches, batch_results):
+                analyses.extend([result] * len(batch) if isinstance(result, Exception) else result)
+            
+            for (title, summary, url, pub_date, preliminary_metals), analysis in chain(decided, zip(pending, analyses)):
+                try:
+                    if isinstance(analysis, Exception):
+                        raise analysis
                     
                     if not analysis.get('is_relevant', False):
                         logger.info(f"❌ DeepSeek отклонил: {analysis.get('reason', 'не релевантно')}")
@@ -156,9 +219,7 @@ class MetalsNewsParser:
                     
                     news_items.append(news_item)
                     logger.info(f"✅ ПРИНЯТО: {title[:60]}... (score: {analysis.get('score', 0):.2f})")
-                    
-                    time.sleep(1.5)
-                    
+                
                 except Exception as e:
                     logger.error(f"Ошибка обработки записи: {e}")
                     continue
@@ -166,42 +227,96 @@ class MetalsNewsParser:
         except Exception as e:
             logger.error(f"Ошибка парсинга RSS {rss_url}: {e}")
         
-        if 'filtered_by_time' not in locals():
-            filtered_by_time = 0
-        
-        logger.info(f"📈 RSS статистика: всего={len(feed.entries) if 'feed' in locals() else 0}, отфильтровано по времени={filtered_by_time}, найдено релевантных={len(news_items)}")
+        logger.info(f"📈 RSS статистика: всего={total_entries}, отфильтровано по времени={filtered_by_time}, найдено релевантных={len(news_items)}")
         
         return news_items
 
+    async def _fetch_feed(self, session: aiohttp.ClientSession, rss_url: str) -> Tuple[bytes, Dict[str, str]]:
+        """Загружает RSS ленту с заголовками ответа: по Content-Type feedparser узнает кодировку без XML декларации"""
+        async with session.get(rss_url) as response:
+            response.raise_for_status()
+            # feedparser ищет заголовки в нижнем регистре
+            headers = {key.lower(): value for key, value in response.headers.items()}
+            return await response.read(), headers
+
+    def _get_parse_executor(self) -> ProcessPoolExecutor:
+        """Пул процессов для разбора HTML, создается при первой крупной ленте"""
+        # К этому моменту процесс уже многопоточный (резолвер aiohttp, эмбеддинги): fork небезопасен
+        if self._parse_executor is None:
+            self._parse_executor = ProcessPoolExecutor(
+                max_workers=self.parse_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._parse_executor
+
+    async def _extract_content(self, session: aiohttp.ClientSession, url: str,
+                               executor: Optional[ProcessPoolExecutor] = None) -> str:
+        """Извлекает текст статьи с ограничением числа параллельных загрузок"""
+        async with self._fetch_semaphore:
+            return await self.content_extractor.extract_article_content(session, url, executor)
+
+    async def _analyze_batch(self, ai_session: Optional[aiohttp.ClientSession],
+                             items: List[Tuple[str, str, List[str]]]) -> List[Dict]:
+        """AI анализ пакета новостей с ограничением числа параллельных запросов"""
+        if not self.ai_analyzer:
+            return [{
+                "is_relevant": False, "metals": [], "summary": "", 
+                "score": 0.0, "reason": "AI недоступен"
+            } for _ in items]
+        
+        async with self._ai_semaphore:
+            logger.info(f"🤖 DeepSeek анализ пакета из {len(items)} новостей: {items[0][0][:50]}...")
+            return await self.ai_analyzer.analyze_news_batch_async(ai_session, items)
+
     def parse_all_sources(self, max_age_hours: int = 24) -> List[NewsItem]:
+        """Синхронная обертка над parse_all_sources_async"""
+        return asyncio.run(self.parse_all_sources_async(max_age_hours))
+
+    async def parse_all_sources_async(self, max_age_hours: int = 24) -> List[NewsItem]:
         """Парсит все источники с подробной статистикой"""
         all_news = []
         
         logger.info("🚀 Начинаем модульный парсинг новостей")
         
+        self._fetch_semaphore = asyncio.Semaphore(self.max_concurrent_fetches)
+        self._ai_semaphore = asyncio.Semaphore(self.max_concurrent_analyses)
+        self._seen_urls = set()
+        ai_context = self.ai_analyzer.create_session() if self.ai_analyzer else nullcontext()
+        requested_before = self.ai_analyzer.requested_items if self.ai_analyzer else 0
+        cached_before = self.ai_analyzer.cached_items if self.ai_analyzer else 0
+        
+        feeds = []
         for source_key, source_data in self.news_sources.items():
             logger.info(f"📰 Обработка источника: {source_data['name']}")
-            source_news = []
-            
-            for rss_url in source_data['rss_urls']:
-                try:
-                    rss_news = self.parse_rss_feed(rss_url, source_data['name'], max_age_hours)
-                    source_news.extend(rss_news)
-                    time.sleep(2)
-                except Exception as e:
-                    logger.error(f"Ошибка источника {source_key}: {e}")
-            
-            all_news.extend(source_news)
-            logger.info(f"📊 Источник {source_data['name']}: {len(source_news)} релевантных новостей")
+            feeds.extend((source_key, rss_url) for rss_url in source_data['rss_urls'])
+        
+        try:
+            async with self.content_extractor.create_session() as session, ai_context as ai_session:
+                results = await asyncio.gather(
+                    *(self.parse_rss_feed(session, ai_session, rss_url, self.news_sources[source_key]['name'], max_age_hours)
+                      for source_key, rss_url in feeds),
+                    return_exceptions=True
+                )
+        finally:
+            if self._parse_executor is not None:
+                self._parse_executor.shutdown()
+                self._parse_executor = None
+        if self.ai_analyzer:
+            self.ai_analyzer.save_caches()
+            self.stats['ai_analyzed'] += self.ai_analyzer.requested_items - requested_before
+            self.stats['resolved_without_ai'] += self.ai_analyzer.cached_items - cached_before
+        
+        source_news = {source_key: [] for source_key in self.news_sources}
+        for (source_key, _), rss_news in zip(feeds, results):
+            if isinstance(rss_news, Exception):
+                logger.error(f"Ошибка источника {source_key}: {rss_news}")
+                continue
+            source_news[source_key].extend(rss_news)
         
-        seen_urls = set()
-        unique_news = []
-        for news in all_news:
-            if news.url not in seen_urls:
-                seen_urls.add(news.url)
-                unique_news.append(news)
+        for source_key, source_data in self.news_sources.items():
+            all_news.extend(source_news[source_key])
+            logger.info(f"📊 Источник {source_data['name']}: {len(source_news[source_key])} релевантных новостей")
         
-        unique_news.sort(key=lambda x: x.relevance_score, reverse=True)
+        unique_news = sorted(all_news, key=lambda x: x.relevance_score, reverse=True)
         
         self.print_processing_stats()
         
@@ -214,25 +329,25 @@ class MetalsNewsParser:
         logger.info(f"   Всего обработано новостей: {self.stats['total_processed']}")
         logger.info(f"   Отфильтровано предфильтром: {self.stats['pre_filtered_out']}")
         logger.info(f"   Отправлено на AI анализ: {self.stats['ai_analyzed']}")
+        logger.info(f"   Решено без AI (эвристика и кэш): {self.stats['resolved_without_ai']}")
         logger.info(f"   Найдено релевантных: {self.stats['relevant_found']}")
         
-        if self.stats['ai_analyzed'] > 0:
-            efficiency = (self.stats['relevant_found'] / self.stats['ai_analyzed']) * 100
+        analyzed = self.stats['ai_analyzed'] + self.stats['resolved_without_ai']
+        if analyzed > 0:
+            efficiency = (self.stats['relevant_found'] / analyzed) * 100
             logger.info(f"   Эффективность AI анализа: {efficiency:.1f}%")
 
     def save_to_json(self, news_items: List[NewsItem], filename: str = "metals_news.json") -> str:
         """Сохраняет новости в JSON с фиксированным именем файла"""
         
-        news_data = []
-        for item in news_items:
-            news_data.append({
-                'title': item.title,
-                'url': item.url,
-                'source': item.source,
-                'published': item.published,
-                'ai_summary': item.ai_summary,
-                'relevance_score': item.relevance_score
-            })
+        news_data = tuple({
+            'title': item.title,
+            'url': item.url,
+            'source': item.source,
+            'published': item.published,
+            'ai_summary': item.ai_summary,
+            'relevance_score': item.relevance_score
+        } for item in news_items)
         
         result = {
             'metadata': {
@@ -248,19 +363,15 @@ class MetalsNewsParser:
             'news': news_data
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2, sort_keys=True)
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
         
         logger.info(f"💾 Новости сохранены: {filename}")
         return filename
 
     def get_metals_stats(self, news_items: List[NewsItem]) -> Dict[str, int]:
         """Статистика по металлам"""
-        stats = {}
-        for item in news_items:
-            for metal in item.metals:
-                stats[metal] = stats.get(metal, 0) + 1
-        return stats
+        return dict(Counter(chain.from_iterable(item.metals for item in news_items)))
 
     def print_summary(self, news_items: List[NewsItem]):
         """Выводит подробную сводку"""
@@ -277,10 +388,12 @@ class MetalsNewsParser:
         print(f"   Всего проверено: {self.stats['total_processed']}")
         print(f"   Предфильтр исключил: {self.stats['pre_filtered_out']}")
         print(f"   AI проанализировал: {self.stats['ai_analyzed']}")
+        print(f"   Решено без AI (эвристика и кэш): {self.stats['resolved_without_ai']}")
         print(f"   Итого релевантных: {self.stats['relevant_found']}")
         
-        if self.stats['ai_analyzed'] > 0:
-            efficiency = (self.stats['relevant_found'] / self.stats['ai_analyzed']) * 100
+        analyzed = self.stats['ai_analyzed'] + self.stats['resolved_without_ai']
+        if analyzed > 0:
+            efficiency = (self.stats['relevant_found'] / analyzed) * 100
             api_savings = 100 - (self.stats['ai_analyzed'] / self.stats['total_processed']) * 100
             print(f"   Точность AI: {efficiency:.1f}%")
             print(f"   Экономия API: {api_savings:.1f}%")
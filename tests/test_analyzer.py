@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import pytest
+
+from analyzer import OpenRouterAnalyzer, _extract_json
+
+
+def test_extracts_object_surrounded_by_text():
+    assert _extract_json('Ответ: {"is_relevant": true, "score": 0.8} Готово.') == {'is_relevant': True, 'score': 0.8}
+
+
+def test_skips_invalid_braces_before_object():
+    assert _extract_json('{не json} и затем {"a": 1} {"b": 2}') == {'a': 1}
+
+
+def test_object_opener_ignores_arrays():
+    assert _extract_json('[1, 2] {"a": [3]}') == {'a': [3]}
+
+
+def test_array_opener_returns_first_list():
+    text = 'Результат:\n```json\n[{"is_relevant": false}, {"is_relevant": true}]\n```'
+    assert _extract_json(text, '[') == [{'is_relevant': False}, {'is_relevant': True}]
+
+
+def test_array_opener_skips_bracketed_prose():
+    assert _extract_json('[примечание] [{"a": 1}]', '[') == [{'a': 1}]
+
+
+def test_returns_none_without_json():
+    assert _extract_json('нет JSON') is None
+    assert _extract_json('{"a": 1', '{') is None
+    assert _extract_json('{"a": 1}', '[') is None
+
+
+class FakeResponse:
+    def __init__(self, status, content=None):
+        self.status = status
+        self._content = content
+    
+    async def json(self):
+        return {"choices": [{"message": {"content": self._content}}]}
+
+
+def single_answer(title):
+    return json.dumps({"is_relevant": True, "metals": ["золото"], "summary": title, "score": 0.9, "reason": "single"},
+                      ensure_ascii=False)
+
+
+@pytest.fixture
+def analyzer():
+    return OpenRouterAnalyzer(api_key='test', use_cache=False)
+
+
+def run_batch(analyzer, monkeypatch, batch_response):
+    requests = []
+    
+    async def fake_post(session, url, **kwargs):
+        prompt = kwargs['json']['messages'][0]['content']
+        is_batch = kwargs['json']['max_tokens'] > analyzer._payload_base['max_tokens']
+        requests.append(('batch' if is_batch else 'single', kwargs.get('timeout')))
+        if is_batch:
+            return batch_response
+        title = next(line for line in prompt.splitlines() if line.startswith('Заголовок:'))[len('Заголовок: '):]
+        return FakeResponse(200, single_answer(title))
+    
+    monkeypatch.setattr(analyzer, '_post_with_backoff', fake_post)
+    items = [(f'Золото {i}', 'цена золота', ['золото']) for i in range(3)]
+    results = asyncio.run(analyzer.analyze_news_batch_async(None, items))
+    return requests, results
+
+
+def test_wrong_length_batch_falls_back_to_single_requests(analyzer, monkeypatch):
+    two_answers = json.dumps([{"is_relevant": True, "score": 0.5}] * 2)
+    requests, results = run_batch(analyzer, monkeypatch, FakeResponse(200, two_answers))
+    
+    assert [kind for kind, _ in requests] == ['batch', 'single', 'single', 'single']
+    assert [r['summary'] for r in results] == ['Золото 0', 'Золото 1', 'Золото 2']
+    assert analyzer.requested_items == 3
+
+
+def test_failed_batch_falls_back_to_single_requests(analyzer, monkeypatch):
+    requests, results = run_batch(analyzer, monkeypatch, FakeResponse(500))
+    
+    assert [kind for kind, _ in requests] == ['batch', 'single', 'single', 'single']
+    assert all(r['reason'] == 'single' for r in results)
+
+
+def test_batch_timeout_scales_with_batch_size(analyzer, monkeypatch):
+    answers = json.dumps([{"is_relevant": False}] * 3)
+    requests, _ = run_batch(analyzer, monkeypatch, FakeResponse(200, answers))
+    
+    assert len(requests) == 1
+    assert requests[0][1].total == analyzer.timeout.total * 3
+
+def test_heuristic_does_not_count_substrings(analyzer):
+    assert analyzer.confident_analysis('Конкурс ювелиров на сцене', 'Слиток в подарок', ['золото']) is None
+
+
+def test_heuristic_ignores_course_in_plural(analyzer):
+    text = 'Курсы ювелирного мастерства, цена билета 500 рублей'
+    assert analyzer.confident_analysis('Слиток как символ: выставка ювелиров', text, ['золото']) is None
+
+
+def test_heuristic_accepts_two_terms(analyzer):
+    analysis = analyzer.confident_analysis('Цена золота растет', '', ['золото'])
+    assert analysis['is_relevant'] is True
+    assert analysis['score'] == 0.75
+    assert analysis['metals'] == ['золото']
+
+
+def test_heuristic_counts_summary_terms(analyzer):
+    assert analyzer.confident_analysis('Золото дорожает', 'Торги на бирже закрылись ростом', ['золото']) is not None
+
+
+def test_heuristic_rejects_single_term(analyzer):
+    assert analyzer.confident_analysis('Цена золота', 'Аналитики ждут решения ФРС', ['золото']) is None
+
+
+def test_heuristic_repeated_term_counts_once(analyzer):
+    assert analyzer.confident_analysis('Цена золота и цена серебра', '', ['золото', 'серебро']) is None
+
+
+def test_figurative_terms_force_the_model(analyzer):
+    assert analyzer.confident_analysis('Золотая медаль: цена победы растет', '', ['золото']) is None
+    assert analyzer.confident_analysis('Серебряный призер', 'курс акций растет', ['серебро']) is None
+
+
+def test_heuristic_needs_metals_and_can_be_disabled(analyzer):
+    assert analyzer.confident_analysis('Цена нефти растет', '', []) is None
+    analyzer.heuristic_min_terms = 0
+    assert analyzer.confident_analysis('Цена золота растет', '', ['золото']) is None
\ No newline at end of file
@@ -0,0 +1,29 @@
+from extractor import _parse_html
+
+
+def test_strips_service_markup_inside_article():
+    html = (
+        '<article><header><nav>Главная | Новости</nav></header>'
+        '<script>var ads={slot:1};</script><style>.x{color:red}</style>'
+        '<p>Цена золота выросла до 2400 долларов.</p>'
+        '<aside>Читайте также</aside><footer>Поделиться</footer></article>'
+    )
+    assert _parse_html(html) == 'Цена золота выросла до 2400 долларов.'
+
+
+def test_empty_article_falls_back_to_paragraphs():
+    assert _parse_html('<article></article><p>Текст статьи</p>') == 'Текст статьи'
+
+
+def test_empty_class_selector_falls_back_to_paragraphs():
+    assert _parse_html('<span class="text"></span><p>Текст статьи</p>') == 'Текст статьи'
+
+
+def test_empty_selector_moves_to_next_selector():
+    html = '<article></article><div class="article-body">Основной текст</div><p>Подпись</p>'
+    assert _parse_html(html) == 'Основной текст'
+
+
+def test_truncates_to_limit():
+    html = '<div class="content">' + '<p>золото</p>' * 1000 + '</div>'
+    assert len(_parse_html(html)) == 2500
\ No newline at end of file
@@ -0,0 +1,45 @@
+import re
+
+import pytest
+
+from filters import NewsPreFilter
+
+
+@pytest.fixture(scope='module')
+def pre_filter():
+    return NewsPreFilter()
+
+
+def regex_metals(pre_filter, text):
+    """Эталон: прежняя проверка ключевых слов через \\b регулярные выражения"""
+    text_lower = text.lower()
+    return frozenset(
+        metal for metal, keywords in pre_filter.metal_keywords.items()
+        if any(re.search(rf'\b{re.escape(keyword.lower())}\b', text_lower) for keyword in keywords)
+    )
+
+
+@pytest.mark.parametrize('text', [
+    'Цена золота выросла до рекорда',
+    'Серебряные монеты и платиновый слиток',
+    'Палладия стало меньше, XPD дорожает',
+    'Gold and silver rally; XAU/USD at highs',
+    'Платформа развития: плата за проезд выросла',
+    'Рекламная площадка pdf-файлов',
+    'Позолота куполов и серебристый цвет',
+    'золото_2024 и серебро',
+    'Котировки: gold, xag — и ничего про платину',
+    '',
+])
+def test_matches_regex_word_boundaries(pre_filter, text):
+    assert pre_filter.contains_metal_keywords(text)[1] == regex_metals(pre_filter, text)
+
+
+def test_substring_inside_word_is_not_a_match(pre_filter):
+    assert pre_filter.contains_metal_keywords('Платформа для выплат') == (False, frozenset())
+
+
+def test_pre_filter_orders_metals_by_keywords(pre_filter):
+    should_process, metals, _ = pre_filter.pre_filter_news('silver и цена золота', '')
+    assert should_process
+    assert metals == ['золото', 'серебро']
\ No newline at end of file
@@ -0,0 +1,18 @@
+from parser import normalize_url
+
+
+def test_drops_utm_parameters_and_keeps_others():
+    url = 'https://example.com/news?id=5&utm_source=rss&UTM_Medium=feed&page=2'
+    assert normalize_url(url) == 'https://example.com/news?id=5&page=2'
+
+
+def test_lowercases_scheme_and_host_but_not_path():
+    assert normalize_url('  HTTPS://Example.COM/News/Gold  ') == 'https://example.com/News/Gold'
+
+
+def test_reposts_with_and_without_tracking_collapse():
+    assert normalize_url('http://site.ru/a5?utm_source=x') == normalize_url('http://site.ru/a5')
+
+
+def test_keeps_blank_values_and_fragment():
+    assert normalize_url('https://site.ru/a?flag=&utm_campaign=c#top') == 'https://site.ru/a?flag=#top'
\ No newline at end of file
@@ -1,3 +1,5 @@
+import argparse
+import asyncio
 import os
 import logging
 from datetime import datetime
@@ -71,15 +73,21 @@ def check_env_configuration():
     
     return True
 
-def run_parser():
+def parse_args():
+    """Разбор аргументов командной строки"""
+    arg_parser = argparse.ArgumentParser(description="Парсер новостей по драгоценным металлам")
+    arg_parser.add_argument('--no-cache', action='store_true', help="не использовать кэш ответов AI и загруженных статей")
+    return arg_parser.parse_args()
+
+def run_parser(use_cache: bool = True):
     logger = logging.getLogger(__name__)
     
     try:
         logger.info("🚀 Запуск модульного парсера...")
         
-        parser = MetalsNewsParser()
+        parser = MetalsNewsParser(use_cache=use_cache)
         
-        news_items = parser.parse_all_sources(max_age_hours=168)
+        news_items = asyncio.run(parser.parse_all_sources_async(max_age_hours=168))
         
         if news_items:
             filename = parser.save_to_json(news_items)
@@ -105,6 +113,8 @@ def run_parser():
 
 def main():
     """Основная функция"""
+    args = parse_args()
+    
     print("🚀 МОДУЛЬНЫЙ DEEPSEEK ПАРСЕР ДРАГОЦЕННЫХ МЕТАЛЛОВ")
     print("=" * 80)
     print("🏗️ Модульная архитектура")
@@ -124,7 +134,7 @@ def main():
         return
     
     # Запускаем парсер
-    success = run_parser()
+    success = run_parser(use_cache=not args.no_cache)
     
     if success:
         logger.info("Программа завершена успешно")